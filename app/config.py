@@ -1,14 +1,33 @@
 import os
-from dotenv import dotenv_values
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
+from dotenv import dotenv_values, find_dotenv
 from datetime import timedelta
 
-# Load the .env file if present (useful for local development)
-file_env_vars = dotenv_values()
 
+@lru_cache(maxsize=1)
+def load_env_file() -> Mapping[str, Optional[str]]:
+    """
+    Load the .env file if present (useful for local development), parsed only once.
+    Skipped entirely when SKIP_DOTENV is set or no .env file exists, as in production
+    where variables come from the runtime environment.
+    """
+    if os.getenv("SKIP_DOTENV"):
+        return MappingProxyType({})
+    dotenv_path = find_dotenv()
+    if not dotenv_path:
+        return MappingProxyType({})
+    return MappingProxyType(dotenv_values(dotenv_path))
 
-# Use environment variables from the runtime environment, falling back to .env file if not found
+
+# Use environment variables from the runtime environment, falling back to .env file if not found.
+# The .env file is only read the first time a variable is missing from the environment.
 def get_env_variable(key, default=None):
-    return os.getenv(key, file_env_vars.get(key, default))
+    value = os.environ.get(key)
+    if value is None:
+        value = load_env_file().get(key, default)
+    return value
 
 
 class Config:
@@ -21,6 +40,13 @@ class Config:
     POSTGRESQL_TABLE_SUBSCRIPTIONS = get_env_variable(
         "POSTGRESQL_TABLE_SUBSCRIPTIONS", "subscriptions"
     )
+    # Connection pool sizing for the async engine
+    DB_POOL_SIZE = int(get_env_variable("DB_POOL_SIZE", 20) or 20)
+    DB_MAX_OVERFLOW = int(get_env_variable("DB_MAX_OVERFLOW", 20) or 20)
+    # Set when connecting through pgbouncer, which can't share prepared statements
+    DB_BEHIND_PGBOUNCER = str(
+        get_env_variable("DB_BEHIND_PGBOUNCER", "false")
+    ).lower() in ("1", "true", "yes")
     POSTGRESQL_URL = f"postgresql://{POSTGRESQL_USER}:{POSTGRESQL_PASS}@{POSTGRESQL_HOST}:{POSTGRESQL_PORT}/{POSTGRESQL_DATABASE}"
 
     # Netsapiens config
@@ -30,6 +56,9 @@ class Config:
     )
     NETSAPIENS_API_CLIENT_ID = get_env_variable("NETSAPIENS_API_CLIENT_ID", "")
     NETSAPIENS_API_CLIENT_PASS = get_env_variable("NETSAPIENS_API_CLIENT_PASS", "")
+    NS_API_CONCURRENCY = int(
+        get_env_variable("NS_API_CONCURRENCY", 20) or 20
+    )  # Max concurrent requests to the NS API
 
     # Other configurations
     SUBSCRIPTION_DURATION = timedelta(
@@ -38,6 +67,8 @@ class Config:
 
     RENEWAL_INTERVAL = int(get_env_variable("RENEWAL_INTERVAL", 3600) or 3600)
     TIME_BEFORE_EXPIRATION = timedelta(minutes=5)
+    # Minimum wait between renewal sweeps, so subscriptions that failed to renew aren't retried in a tight loop
+    RENEWAL_RETRY_INTERVAL = int(get_env_variable("RENEWAL_RETRY_INTERVAL", 60) or 60)
 
     # Logging configuration
     LOG_LEVEL = get_env_variable("LOG_LEVEL", "INFO")
@@ -1,9 +1,20 @@
 import logging
 from contextlib import asynccontextmanager
-from typing import Dict, List, Type, Any, AsyncGenerator
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Type,
+)
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import delete, lambda_stmt, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.future import select
 from fastapi import HTTPException
 
@@ -16,6 +27,21 @@ engine = create_async_engine(
     Config.POSTGRESQL_URL.replace("postgresql://", "postgresql+asyncpg://"),
     echo=False,  # Set to False in production for less verbose logging
     future=True,
+    # asyncio engines need the async-adapted pool; a plain QueuePool is not safe here
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,  # Drop dead connections before handing them out
+    pool_recycle=1800,  # Recycle connections every 30 minutes
+    pool_timeout=30,
+    connect_args={
+        # JIT compilation only adds latency for the short queries this service runs
+        "server_settings": {"jit": "off"},
+        # pgbouncer can't share prepared statements across server connections, so
+        # disable both asyncpg's cache and SQLAlchemy's own prepared statement cache
+        "statement_cache_size": 0 if Config.DB_BEHIND_PGBOUNCER else 100,
+        "prepared_statement_cache_size": 0 if Config.DB_BEHIND_PGBOUNCER else 100,
+    },
 )
 
 # Create a new async session factory.
@@ -53,6 +79,15 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
 
 
+def _where_equals(column: Any, value: Any) -> Callable[[Any], Any]:
+    """
+    Builds a cacheable lambda criterion `column == value`.
+    A factory is used so each lambda closes over its own column and value;
+    lambdas created directly in a loop would all share the last loop variables.
+    """
+    return lambda query: query.where(column == value)
+
+
 async def read_from_table(model: Type[Any], filters: Dict = {}) -> List[Any]:
     """
     Generic function to read rows from a table.
@@ -63,7 +98,10 @@ async def read_from_table(model: Type[Any], filters: Dict = {}) -> List[Any]:
     """
     try:
         async with get_session() as session:
-            query = select(model).filter_by(**filters)
+            # lambda statements are cached by shape, so repeated calls skip building the query
+            query = lambda_stmt(lambda: select(model))
+            for key, value in filters.items():
+                query += _where_equals(getattr(model, key), value)
             result = await session.execute(query)
             rows = result.scalars().all()
             logger.info(
@@ -77,9 +115,12 @@ async def read_from_table(model: Type[Any], filters: Dict = {}) -> List[Any]:
 
 async def update_table(model: Type[Any], filters: Dict, update_data: Dict) -> None:
     """
-    Generic function to update rows in a table, performing an upsert:
-      - If rows matching `filters` exist, they are updated with `update_data`.
-      - If no rows match, a new row is inserted using the combined filters and update_data.
+    Generic function to upsert a row in a table with a single
+    INSERT ... ON CONFLICT DO UPDATE statement:
+      - If a row matching `filters` exists, it is updated with `update_data`.
+      - If no row matches, a new row is inserted using the combined filters and update_data.
+
+    The columns in `filters` must be covered by a unique constraint (e.g. subscription_id).
 
     :param model: SQLAlchemy model class.
     :param filters: Dictionary of filters to locate rows.
@@ -87,53 +128,131 @@ async def update_table(model: Type[Any], filters: Dict, update_data: Dict) -> No
     """
     try:
         async with get_session() as session:
-            query = select(model).filter_by(**filters)
-            result = await session.execute(query)
-            rows = result.scalars().all()
-            if not rows:
-                # No record found; perform an insert (upsert behavior)
-                data = {**filters, **update_data}
-                new_instance = model(**data)
-                session.add(new_instance)
-                logger.info(
-                    f"No rows found in {model.__tablename__} for filters: {filters}; "
-                    f"inserted new record with data: {data}"
-                )
-            else:
-                # Update all matching rows
-                for row in rows:
-                    for key, value in update_data.items():
-                        setattr(row, key, value)
-                logger.info(
-                    f"Updated {len(rows)} rows in {model.__tablename__} with data: {update_data}"
-                )
+            data = {**filters, **update_data}
+            stmt = pg_insert(model).values(**data)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(filters.keys()), set_=update_data
+            )
+            await session.execute(stmt)
+            logger.info(
+                f"Upserted row in {model.__tablename__} for filters: {filters} with data: {update_data}"
+            )
     except SQLAlchemyError as e:
         logger.exception(f"Database error while updating/upserting table: {e}")
         raise HTTPException(status_code=500, detail="Failed to update database") from e
 
 
-async def delete_from_table(model: Type[Any], filters: Dict) -> None:
+async def bulk_upsert(
+    model: Type[Any], rows: List[Dict], key: str = "subscription_id"
+) -> None:
     """
-    Generic function to delete rows from a table.
+    Generic function to upsert many rows with one multi-row
+    INSERT ... ON CONFLICT DO UPDATE statement, instead of one `update_table` call per row.
 
     :param model: SQLAlchemy model class.
-    :param filters: Dictionary of filters to identify rows to delete.
+    :param rows: List of column dictionaries; all rows must have the same keys.
+    :param key: Unique column used to detect conflicts.
     """
+    if not rows:
+        return
     try:
         async with get_session() as session:
-            query = select(model).filter_by(**filters)
-            result = await session.execute(query)
-            rows = result.scalars().all()
-            if not rows:
-                logger.warning(
-                    f"No rows found in {model.__tablename__} for filters: {filters}"
-                )
-                raise HTTPException(status_code=404, detail="Record not found")
-            for row in rows:
-                await session.delete(row)
+            stmt = pg_insert(model).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[key],
+                set_={col: stmt.excluded[col] for col in rows[0] if col != key},
+            )
+            await session.execute(stmt)
+            logger.info(f"Upserted {len(rows)} rows in {model.__tablename__}")
+    except SQLAlchemyError as e:
+        logger.exception(f"Database error while bulk upserting table: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update database") from e
+
+
+async def update_rows(
+    model: Type[Any],
+    filters: Dict,
+    update_data: Dict,
+    where: Optional[Any] = None,
+) -> int:
+    """
+    Generic function to update existing rows with a single UPDATE statement.
+    Unlike `update_table`, no row is inserted when nothing matches.
+
+    :param model: SQLAlchemy model class.
+    :param filters: Dictionary of filters to locate rows.
+    :param update_data: Dictionary of column updates.
+    :param where: Optional extra SQL condition (e.g., model.domain.in_([...])).
+    :return: Number of rows updated.
+    """
+    try:
+        async with get_session() as session:
+            stmt = update(model).filter_by(**filters)
+            if where is not None:
+                stmt = stmt.where(where)
+            stmt = stmt.values(**update_data).execution_options(
+                synchronize_session=False
+            )
+            result = await session.execute(stmt)
             logger.info(
-                f"Deleted {len(rows)} rows from {model.__tablename__} with filters: {filters}"
+                f"Updated {result.rowcount} rows in {model.__tablename__} with data: {update_data}"
+            )
+            return result.rowcount
+    except SQLAlchemyError as e:
+        logger.exception(f"Database error while updating table: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update database") from e
+
+
+async def bulk_update(
+    model: Type[Any],
+    ids: List[Any],
+    update_data: Dict,
+    key: str = "subscription_id",
+) -> int:
+    """
+    Generic function to apply the same update to many rows in a single statement.
+
+    :param model: SQLAlchemy model class.
+    :param ids: Values of `key` identifying the rows to update.
+    :param update_data: Dictionary of column updates.
+    :param key: Name of the column matched against `ids`.
+    :return: Number of rows updated.
+    """
+    if not ids:
+        return 0
+    return await update_rows(model, {}, update_data, where=getattr(model, key).in_(ids))
+
+
+async def delete_from_table(
+    model: Type[Any], filters: Dict, check_exists: bool = True
+) -> int:
+    """
+    Generic function to delete rows from a table with a single DELETE statement.
+
+    :param model: SQLAlchemy model class.
+    :param filters: Dictionary of filters to identify rows to delete.
+    :param check_exists: Raise a 404 HTTPException if no rows matched.
+    :return: Number of rows deleted.
+    """
+    try:
+        async with get_session() as session:
+            stmt = (
+                delete(model)
+                .filter_by(**filters)
+                .execution_options(synchronize_session=False)
             )
+            result = await session.execute(stmt)
+            deleted = result.rowcount
     except SQLAlchemyError as e:
         logger.exception(f"Database error while deleting from table: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete from database")
+
+    if not deleted:
+        logger.warning(f"No rows found in {model.__tablename__} for filters: {filters}")
+        if check_exists:
+            raise HTTPException(status_code=404, detail="Record not found")
+        return 0
+    logger.info(
+        f"Deleted {deleted} rows from {model.__tablename__} with filters: {filters}"
+    )
+    return deleted
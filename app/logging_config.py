@@ -1,18 +1,32 @@
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
 from colorlog import ColoredFormatter
 from .config import Config
 
+# Background listener that formats and writes queued log records
+_listener: Optional[QueueListener] = None
+# The root logger's handler feeding that listener
+_queue_handler: Optional[QueueHandler] = None
+
 
 def setup_logging():
     """
     Configures logging with structured JSON output.
 
+    The root logger only gets a QueueHandler; formatting and writing to stdout/file
+    happen on a QueueListener background thread so logging never blocks the event loop.
+
     Expected Config variables:
       - LOG_LEVEL: Logging level (e.g., "INFO", "DEBUG")
       - LOG_FILE: (Optional) File path to log to. If empty or not set, only stdout is used.
     """
+    global _listener, _queue_handler
+
     # Get log level and file path from Config
     log_level = (Config.LOG_LEVEL or "INFO").upper()
     log_file = Config.LOG_FILE if hasattr(Config, "LOG_FILE") else None
@@ -22,6 +36,7 @@ def setup_logging():
     logger.setLevel(log_level)
 
     # Remove any existing handlers to prevent duplicate logs
+    stop_logging()
     if logger.hasHandlers():
         logger.handlers.clear()
 
@@ -42,14 +57,21 @@ def setup_logging():
         },
     )
     stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+    handlers = [stream_handler]
 
     # Optionally add a FileHandler if LOG_FILE is specified
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Route all records through a queue to the real handlers
+    log_queue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     logger.info(
         "Logging configuration complete",
@@ -57,6 +79,28 @@ def setup_logging():
     )
 
 
+def stop_logging():
+    """
+    Stops the background log listener, flushing any queued records.
+    The root logger gets the real handlers back first, so records logged afterwards are
+    written directly instead of queued for a listener that is gone.
+    Runs at interpreter exit; safe to call more than once.
+    """
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
+
+
+atexit.register(stop_logging)
+
+
 if __name__ == "__main__":
     setup_logging()
     logging.info("This is a test log message")
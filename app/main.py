@@ -1,13 +1,16 @@
 import asyncio
 import logging
 from datetime import datetime, timezone
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Optional, Tuple
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from sqlalchemy.ext.asyncio import AsyncConnection
 from app.config import Config
 from app.subs_db import SubscriptionsDB
 from app.ns import NetsapiensAPI
 from app.models import Subscriptions, SubscriptionRequest
-from app.db_utils import update_table, read_from_table
+from app.db_utils import update_table, bulk_update, bulk_upsert
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,13 +22,58 @@ class SubscriptionService:
         self.db = SubscriptionsDB()
         self.ns_api = NetsapiensAPI()
         self.renewal_interval = Config.RENEWAL_INTERVAL  # e.g., in seconds
+        # cap concurrent NS API calls so renewals don't hammer the upstream
+        self.ns_api_semaphore = asyncio.Semaphore(Config.NS_API_CONCURRENCY)
+        # per-domain (access_token, refresh_token, expires_at), reused until close to expiry
+        self._token_cache: Dict[str, Tuple[str, str, datetime]] = {}
+        # one lock per domain so concurrent renewals don't refresh the same token twice
+        self._token_locks: DefaultDict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
 
     async def start(self):
         """
-        Initialize the service: set up the database table and perform an initial subscription check.
-        Then enter an infinite loop to periodically check subscriptions.
+        Initialize the service and run subscription renewals.
+        When the app runs with several worker processes, only the one holding the renewal
+        advisory lock does the work; the others stand by and take over if it goes away.
         """
         logger.info("Starting subscription service...")
+        if Config.DB_BEHIND_PGBOUNCER:
+            # with transaction pooling a session-level advisory lock isn't pinned to one
+            # backend, so it can't elect a single worker; run renewals here unguarded
+            logger.warning(
+                "DB_BEHIND_PGBOUNCER is set: skipping the renewal lock election. "
+                "Run a single worker, or every worker will run renewals."
+            )
+        while True:
+            try:
+                if Config.DB_BEHIND_PGBOUNCER:
+                    await self.run_renewals()
+                else:
+                    await self.run_renewals_if_leader()
+            except Exception:
+                # a database blip must not end the task: retry, or stand by again
+                logger.exception("Subscription renewal loop failed; retrying.")
+            await asyncio.sleep(Config.RENEWAL_RETRY_INTERVAL)
+
+    async def run_renewals_if_leader(self):
+        """
+        Run renewals while holding the renewal advisory lock.
+        Returns straight away if another worker holds it, or once the lock is lost.
+        """
+        lock_conn = await self.db.acquire_renewal_lock()
+        if lock_conn is None:
+            logger.info("Another worker is running subscription renewals; standing by.")
+            return
+        try:
+            await self.run_renewals(lock_conn)
+        finally:
+            await self.db.release_renewal_lock(lock_conn)
+
+    async def run_renewals(self, lock_conn: Optional[AsyncConnection] = None):
+        """
+        Set up the database table and perform an initial subscription check.
+        Then loop, sleeping until the next subscription is due for renewal.
+        Returns if the renewal lock on `lock_conn` is lost (never, without a lock).
+        """
         # Ensure the subscriptions table exists.
         await self.db.setup_table()
         # Perform an initial check.
@@ -33,15 +81,40 @@ class SubscriptionService:
 
         # Continuously check for expiring subscriptions.
         while True:
-            await asyncio.sleep(self.renewal_interval)
+            # back off first so subscriptions that failed to renew aren't retried immediately
+            await asyncio.sleep(Config.RENEWAL_RETRY_INTERVAL)
+            delay = await self.seconds_until_next_renewal()
+            while delay > 0:
+                logger.info(f"Next subscription renewal check in {delay:.0f} seconds.")
+                await asyncio.sleep(delay)
+                delay = await self.seconds_until_next_renewal()
+            if lock_conn is not None and not await self.db.holds_renewal_lock(
+                lock_conn
+            ):
+                return
             await self.check_and_update_subscriptions()
 
+    async def seconds_until_next_renewal(self) -> float:
+        """
+        Seconds until the earliest subscription is due for renewal, so the service only runs
+        a sweep when something is actually due. Rows that failed recently count from their
+        last attempt, so they don't keep the delay at zero. Capped at the renewal interval so
+        subscriptions added in the meantime are still picked up.
+        """
+        next_due = await self.db.fetch_next_due()
+        if next_due is None:
+            return self.renewal_interval
+        delay = (next_due - datetime.now(timezone.utc)).total_seconds()
+        return min(max(delay, 0), self.renewal_interval)
+
     async def shutdown(self):
         """
         Shutdown cleanup logic.
         With the new async session management via get_session(), no explicit DB close is necessary.
+        The shared NS API HTTP client is closed here to release its pooled connections.
         """
         logger.info("Shutting down subscription service...")
+        await self.ns_api.aclose()
 
     async def check_and_update_subscriptions(self):
         """
@@ -49,66 +122,148 @@ class SubscriptionService:
         """
 
         logger.info("Checking for subscriptions that need renewal...")
-        # find all expiring/expired subscriptions
-        subscriptions = await self.db.fetch_expiring_subscriptions()
-        # filter out the unique domains with expiring subscriptions
-        logger.info(
-            "Filtering for unique domains with subscriptions that need updating..."
-        )
-        expiring_domain = list({d.domain for d in subscriptions})
+        # find the unique domains with expiring/expired subscriptions
+        expiring_domain = await self.db.fetch_expiring_domains()
         # for each expiring domain update all subscriptions therein
-        logger.info(
-            f"Fetched {len(expiring_domain)} domains with expiring subscriptions."
-        )
         if expiring_domain:
             # generate a new expiration time
             now = datetime.now(timezone.utc)
-            new_expire_dt_obj = now + Config.SUBSCRIPTION_DURATION
-            new_expire = new_expire_dt_obj.strftime("%Y-%m-%d %H:%M:%S")
-            for sub in expiring_domain:
-                logger.info(f"Renewing subscriptions for {sub}")
-                # find all the subscriptions for the current domain
-                expiring_subs = await read_from_table(
-                    model=Subscriptions, filters={"domain": f"{sub}"}
-                )
-                # renew oauth token using the first model returned from the database since they should all be the same... right?..... RIGHT?!
-                new_token_data = await self.ns_api.refresh_access_token(
-                    expiring_subs[0].refresh_token
-                )
-                if new_token_data.get("access_token"):
-                    new_oauth_token = str(new_token_data.get("access_token"))
-                else:
-                    raise Exception("Failed to get new token for {sub.domain}")
-
-                new_refresh_token = new_token_data.get("refresh_token")
-                # update each subscription
-                for sublist in expiring_subs:
-                    # update subscription via NMS API
-                    await self.ns_api.update_subscription(
-                        new_expire,
-                        sublist.subscription_id,
-                        new_oauth_token,
-                        sublist.domain,
-                    )
-                    # update DB
-                    update_data = {
-                        "expires": new_expire,
-                        "last_updated": datetime.now(timezone.utc).strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        ),
-                        "oauth_token": new_oauth_token,
-                        "refresh_token": new_refresh_token,
-                    }
-                    await update_table(
-                        Subscriptions,
-                        {"subscription_id": sublist.subscription_id},
-                        update_data,
+            new_expire = now + Config.SUBSCRIPTION_DURATION
+            # load the subscriptions for all expiring domains in one query
+            subs_by_domain = await self.db.fetch_subscriptions_by_domain(
+                expiring_domain
+            )
+            # renew every domain concurrently; one failing domain must not block the others
+            results = await asyncio.gather(
+                *[
+                    self._renew_domain(sub, expiring_subs, new_expire, now)
+                    for sub, expiring_subs in subs_by_domain.items()
+                ],
+                return_exceptions=True,
+            )
+            for sub, result in zip(subs_by_domain, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to renew subscriptions for {sub}: {result}")
+                    # back the whole domain off until the next interval
+                    failed_ids = [row.subscription_id for row in subs_by_domain[sub]]
+                    await bulk_update(
+                        Subscriptions, failed_ids, {"last_renewal_attempt": now}
                     )
 
         else:
             logger.info("No subscriptions need renewal.")
 
-    async def setup_new_subscription(self, request: SubscriptionRequest):
+    async def _renew_domain(
+        self,
+        domain: str,
+        expiring_subs: List[Subscriptions],
+        new_expire: datetime,
+        now: datetime,
+    ):
+        """
+        Refresh the OAuth token for a domain and renew all of its subscriptions concurrently.
+        """
+        logger.info(f"Renewing subscriptions for {domain}")
+        # renew oauth token using the first model returned from the database since they should all be the same... right?..... RIGHT?!
+        new_oauth_token, new_refresh_token = await self._get_domain_token(
+            domain, expiring_subs[0].refresh_token
+        )
+        # update each subscription via NMS API
+        results = await asyncio.gather(
+            *[
+                self._renew_one(sub, new_expire, new_oauth_token)
+                for sub in expiring_subs
+            ],
+            return_exceptions=True,
+        )
+        renewed_ids = []
+        failed_ids = []
+        for sub, result in zip(expiring_subs, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Failed to renew subscription {sub.subscription_id}: {result}"
+                )
+                failed_ids.append(sub.subscription_id)
+            else:
+                renewed_ids.append(sub.subscription_id)
+
+        # every row in the domain gets the same values, so update them in one statement
+        token_data = {
+            "oauth_token": new_oauth_token,
+            "refresh_token": new_refresh_token,
+        }
+        if renewed_ids:
+            update_data = {
+                "expires": new_expire,
+                # one timestamp for the whole sweep, shared by every domain
+                "last_updated": now,
+                "last_renewal_attempt": now,
+                **token_data,
+            }
+            await bulk_update(Subscriptions, renewed_ids, update_data)
+        if failed_ids:
+            # record the attempt so failed rows are retried next interval, not every sweep;
+            # the old refresh token may no longer be valid, so persist the new one too
+            await bulk_update(
+                Subscriptions, failed_ids, {"last_renewal_attempt": now, **token_data}
+            )
+
+    async def _get_domain_token(
+        self, domain: str, refresh_token: str
+    ) -> Tuple[str, str]:
+        """
+        Return (access_token, refresh_token) for a domain, reusing the cached token while
+        it is valid for longer than TIME_BEFORE_EXPIRATION and refreshing it otherwise.
+        """
+        async with self._token_locks[domain]:
+            cached = self._token_cache.get(domain)
+            if cached:
+                access_token, cached_refresh_token, expires_at = cached
+                if expires_at - Config.TIME_BEFORE_EXPIRATION > datetime.now(
+                    timezone.utc
+                ):
+                    logger.info(f"Reusing cached token for {domain}")
+                    return access_token, cached_refresh_token
+                refresh_token = cached_refresh_token
+
+            async with self.ns_api_semaphore:
+                new_token_data = await self.ns_api.refresh_access_token(refresh_token)
+            if new_token_data.get("access_token"):
+                new_oauth_token = str(new_token_data.get("access_token"))
+            else:
+                raise Exception(f"Failed to get new token for {domain}")
+
+            # keep using the current refresh token if the API didn't rotate it
+            new_refresh_token = new_token_data.get("refresh_token") or refresh_token
+            self._token_cache[domain] = (
+                new_oauth_token,
+                new_refresh_token,
+                new_token_data["expires"],
+            )
+            return new_oauth_token, new_refresh_token
+
+    async def _renew_one(
+        self,
+        sub: Subscriptions,
+        new_expire: datetime,
+        new_oauth_token: str,
+    ):
+        """
+        Push the new expiration for a single subscription to the NS API.
+        """
+        async with self.ns_api_semaphore:
+            await self.ns_api.update_subscription(
+                new_expire,
+                sub.subscription_id,
+                new_oauth_token,
+                sub.domain,
+            )
+
+    async def _provision_subscription(self, request: SubscriptionRequest) -> Dict:
+        """
+        Authenticate and create the subscription on the NS API.
+        Returns the row to store for it; raises HTTPException on failure.
+        """
         logger.info(f"Creating new subscription for {request.user}@{request.domain}")
         # trade un/pw for tokens
         try:
@@ -122,6 +277,12 @@ class SubscriptionService:
             raise HTTPException(
                 status_code=500, detail="Failed to retrieve access token"
             )
+        # the row can't be stored without it, so fail before creating anything upstream
+        if not token_dict.get("refresh_token"):
+            logger.error("No refresh token received from NS API")
+            raise HTTPException(
+                status_code=500, detail="Failed to retrieve refresh token"
+            )
 
         try:
             # Pass the provided username and password to the NS API call.
@@ -136,6 +297,7 @@ class SubscriptionService:
             subscription_id = subscription_response.get("subscription_id")
             if not subscription_id:
                 raise Exception("Failed to retrieve subscription ID from NS API")
+            expires_at = subscription_response["expires_at"]
 
             logger.info(
                 f"Subscription created successfully for {request.user}@{request.domain}"
@@ -144,23 +306,24 @@ class SubscriptionService:
         except Exception as e:
             logger.error(f"Failed to create subscription: {e}")
             raise HTTPException(status_code=500, detail=str(e))
+        return {
+            "subscription_id": subscription_id,
+            "domain": request.domain,
+            "model": request.model,
+            # parsed once by the NS API layer; SQLAlchemy binds the datetime directly
+            "expires": expires_at,
+            "post_url": request.post_url,
+            "user": request.user,
+            "oauth_token": access_token,
+            "refresh_token": token_dict.get("refresh_token"),
+            "last_updated": datetime.now(timezone.utc),
+        }
+
+    async def setup_new_subscription(self, request: SubscriptionRequest):
+        update_data = await self._provision_subscription(request)
+        subscription_id = update_data["subscription_id"]
         # update database with new subscription info
         try:
-            update_data = {
-                "subscription_id": subscription_id,
-                "domain": request.domain,
-                "model": request.model,
-                # Use "expires_at" if available; otherwise, fall back to "subscription-expires-datetime"
-                "expires": subscription_response.get("expires_at")
-                or subscription_response.get("subscription-expires-datetime"),
-                "post_url": request.post_url,
-                "user": request.user,
-                "oauth_token": access_token,
-                "renewal_token": token_dict.get("refresh_token"),
-                "last_updated": datetime.now(timezone.utc).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                ),
-            }
             filters = {"subscription_id": subscription_id}
             await update_table(Subscriptions, filters, update_data)
         except Exception as e:
@@ -173,10 +336,60 @@ class SubscriptionService:
         return {
             "status": "success",
             "subscription_id": subscription_id,
-            "expires": subscription_response.get("expires_at")
-            or subscription_response.get("subscription-expires-datetime"),
+            "expires": update_data["expires"],
         }
 
+    async def setup_new_subscriptions(
+        self, requests: List[SubscriptionRequest]
+    ) -> List[Dict]:
+        """
+        Create several subscriptions at once: the NS API calls run concurrently
+        (bounded by the NS API semaphore) and every successful row is stored with a
+        single bulk upsert. Returns one result per request, in request order.
+        """
+
+        async def provision(request: SubscriptionRequest) -> Dict:
+            async with self.ns_api_semaphore:
+                return await self._provision_subscription(request)
+
+        outcomes = await asyncio.gather(
+            *(provision(request) for request in requests), return_exceptions=True
+        )
+        rows = [outcome for outcome in outcomes if isinstance(outcome, dict)]
+        try:
+            await bulk_upsert(Subscriptions, rows)
+        except Exception as e:
+            # these subscriptions already exist upstream, so one bad row must not leave
+            # the rest without a database entry: store them one at a time instead
+            logger.error(f"Bulk upsert failed, storing rows one by one: {e}")
+            for i, outcome in enumerate(outcomes):
+                if not isinstance(outcome, dict):
+                    continue
+                try:
+                    filters = {"subscription_id": outcome["subscription_id"]}
+                    await update_table(Subscriptions, filters, outcome)
+                except Exception as row_error:
+                    logger.error(
+                        f"Failed to store subscription {outcome['subscription_id']}: "
+                        f"{row_error}"
+                    )
+                    outcomes[i] = row_error
+
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, dict):
+                results.append(
+                    {
+                        "status": "success",
+                        "subscription_id": outcome["subscription_id"],
+                        "expires": outcome["expires"],
+                    }
+                )
+            else:
+                detail = getattr(outcome, "detail", str(outcome))
+                results.append({"status": "error", "detail": detail})
+        return results
+
 
 # Create an instance of the subscription service.
 subscription_service = SubscriptionService()
@@ -195,8 +408,10 @@ async def lifespan(_: FastAPI):
         yield
     finally:
         logger.info("Shutting down subscription service...")
-        await subscription_service.shutdown()
+        # stop the renewal loop first so it releases the renewal lock
         task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await subscription_service.shutdown()
 
 
 # Create the FastAPI app with the lifespan handler.
@@ -212,6 +427,15 @@ async def create_subscription_endpoint(request: SubscriptionRequest):
     return await subscription_service.setup_new_subscription(request)
 
 
+@app.post("/create-subscriptions")
+async def create_subscriptions_endpoint(requests: List[SubscriptionRequest]):
+    """
+    API endpoint to create several subscriptions in one call.
+    """
+    logger.info(f"Received batch creation request for {len(requests)} subscriptions")
+    return await subscription_service.setup_new_subscriptions(requests)
+
+
 @app.get("/status")
 async def get_status():
     """
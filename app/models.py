@@ -13,10 +13,17 @@ class Subscriptions(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=text("CURRENT_TIMESTAMP")
     )
-    last_updated: Mapped[str | None] = mapped_column(String(30))
+    # last time the row's data was written (created, renewed or touched by the scheduler)
+    last_updated: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # last time a renewal was attempted, successful or not; drives the renewal backoff
+    last_renewal_attempt: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
     domain: Mapped[str] = mapped_column(String(255), nullable=False)
     model: Mapped[str] = mapped_column(String(255), nullable=False)
-    expires: Mapped[str] = mapped_column(String(255), nullable=False)
+    expires: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
     subscription_id: Mapped[str] = mapped_column(
         String(255), nullable=False, unique=True
     )
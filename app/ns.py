@@ -1,5 +1,6 @@
 import logging
 import httpx
+import orjson
 from datetime import datetime, timezone, timedelta
 
 from .config import Config
@@ -7,17 +8,54 @@ from .config import Config
 logger = logging.getLogger(__name__)
 
 
+def parse_ns_datetime(value: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp from the NS API into an aware datetime (UTC if no offset).
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
 class NetsapiensAPI:
     def __init__(self):
         self.base_url = Config.NETSAPIENS_API_URL
         self.client_id = Config.NETSAPIENS_API_CLIENT_ID
         self.client_secret = Config.NETSAPIENS_API_CLIENT_PASS
+        self._client: httpx.AsyncClient | None = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client, creating it on first use.
+
+        A single client keeps a pool of keep-alive (HTTP/2) connections to the NS API,
+        so repeated calls reuse sockets instead of paying a new TCP/TLS handshake each time.
+        Concurrent requests, such as a domain's renewal PUTs, are multiplexed as HTTP/2 streams,
+        and every pooled connection is kept alive between bursts. Auth headers are passed per request.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=True,
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=50),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP client and release its pooled connections.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_token(self, username: str, password: str) -> dict:
         """
         Request a new OAuth2 token using the provided username and password.
         """
-        url = f"{self.base_url}/ns-api/v2/tokens"
+        url = "/ns-api/v2/tokens"
         headers = {"accept": "application/json", "content-type": "application/json"}
         payload = {
             "grant_type": "password",
@@ -26,32 +64,32 @@ class NetsapiensAPI:
             "username": username,
             "password": password,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            if response.status_code == 200:
-                token_data = response.json()
-                if token_data.get("access_token"):
-                    expires_in = token_data.get("expires_in", 0)
-                    token_data["expires"] = (
-                        datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-                    ).strftime("%Y-%m-%d %H:%M:%S")
-                    return token_data
-                else:
-                    raise Exception(
-                        f"Oauth Failed to return an access token: {token_data}"
-                    )
-            else:
-                error_message = response.text
-                logger.error(
-                    f"get_token - Failed to retrieve token. Response: {error_message}"
+        client = self.get_client()
+        response = await client.post(
+            url, content=orjson.dumps(payload), headers=headers
+        )
+        if response.status_code == 200:
+            token_data = orjson.loads(response.content)
+            if token_data.get("access_token"):
+                expires_in = token_data.get("expires_in", 0)
+                token_data["expires"] = datetime.now(timezone.utc) + timedelta(
+                    seconds=expires_in
                 )
-                raise Exception(f"Failed to get token: {error_message}")
+                return token_data
+            else:
+                raise Exception(f"Oauth Failed to return an access token: {token_data}")
+        else:
+            error_message = response.text
+            logger.error(
+                "get_token - Failed to retrieve token. Response: %s", error_message
+            )
+            raise Exception(f"Failed to get token: {error_message}")
 
     async def refresh_access_token(self, refresh_token: str) -> dict:
         """
         Refresh the OAuth2 token using the provided refresh token.
         """
-        url = f"{self.base_url}/ns-api/v2/tokens"
+        url = "/ns-api/v2/tokens"
         headers = {"accept": "application/json", "content-type": "application/json"}
         payload = {
             "grant_type": "refresh_token",
@@ -59,22 +97,25 @@ class NetsapiensAPI:
             "client_secret": self.client_secret,
             "refresh_token": refresh_token,
         }
-        logger.info(f"Sending Token refresh to:\n{url}\n{payload}")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            if response.status_code == 200:
-                token_data = response.json()
-                expires_in = token_data.get("expires_in", 0)
-                token_data["expires"] = (
-                    datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-                ).strftime("%Y-%m-%d %H:%M:%S")
-                return token_data
-            else:
-                error_message = response.text
-                logger.error(
-                    f"refresh_access_token - Failed to refresh token. Response: {error_message}"
-                )
-                raise Exception(f"Failed to refresh token: {error_message}")
+        logger.info("Sending Token refresh to:\n%s\n%s", url, payload)
+        client = self.get_client()
+        response = await client.post(
+            url, content=orjson.dumps(payload), headers=headers
+        )
+        if response.status_code == 200:
+            token_data = orjson.loads(response.content)
+            expires_in = token_data.get("expires_in", 0)
+            token_data["expires"] = datetime.now(timezone.utc) + timedelta(
+                seconds=expires_in
+            )
+            return token_data
+        else:
+            error_message = response.text
+            logger.error(
+                "refresh_access_token - Failed to refresh token. Response: %s",
+                error_message,
+            )
+            raise Exception(f"Failed to refresh token: {error_message}")
 
     async def create_subscription(
         self,
@@ -108,47 +149,48 @@ class NetsapiensAPI:
             "user": user,
         }
 
-        url = f"{self.base_url}/ns-api/v2/subscriptions"
+        url = "/ns-api/v2/subscriptions"
         headers = {
             "accept": "application/json",
             "content-type": "application/json",
             "Authorization": f"Bearer {token}",
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-            logger.debug(
-                f"create_subscription - Response status: {response.status_code}"
+        client = self.get_client()
+        response = await client.post(
+            url, content=orjson.dumps(payload), headers=headers
+        )
+        logger.debug("create_subscription - Response status: %s", response.status_code)
+
+        if not 200 <= response.status_code < 300:
+            # only decode the body when there is something worth reading
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("create_subscription - Response text: %s", response.text)
+            raise Exception(
+                f"Failed to create subscription. Status: {response.status_code}"
+            )
+
+        try:
+            subscription_data = orjson.loads(response.content)
+            logger.info(
+                "Subscription created successfully: ID=%s, User=%s@%s, Expires=%s",
+                subscription_data.get("id"),
+                subscription_data.get("user"),
+                subscription_data.get("domain"),
+                subscription_data.get("subscription-expires-datetime"),
+            )
+            # add parsed versions of creation and expiration date/times to the return dict
+            subscription_data["created_at"] = parse_ns_datetime(
+                subscription_data.get("subscription-creation-datetime")
             )
-            logger.debug(f"create_subscription - Response text: {response.text}")
-
-            if response.status_code in (200, 201):
-                try:
-                    subscription_data = response.json()
-                    logger.info(
-                        f"Subscription created successfully: "
-                        f"ID={subscription_data.get('id')}, "
-                        f"User={subscription_data.get('user')}@{subscription_data.get('domain')}, "
-                        f"Expires={subscription_data.get('subscription-expires-datetime')}"
-                    )
-                    # add formatted versions of creation and expiration date/times to the return dict
-                    subscription_data["created_at"] = datetime.fromisoformat(
-                        subscription_data.get("subscription-creation-datetime")
-                    ).strftime("%Y-%m-%d %H:%M:%S")
-
-                    subscription_data["expires_at"] = datetime.fromisoformat(
-                        subscription_data.get("subscription-expires-datetime")
-                    ).strftime("%Y-%m-%d %H:%M:%S")
-                    return subscription_data
-                except Exception as parse_error:
-                    logger.error(f"Error parsing subscription response: {parse_error}")
-                    raise Exception(
-                        "Failed to parse subscription response"
-                    ) from parse_error
-            else:
-                raise Exception(
-                    f"Failed to create subscription. Status: {response.status_code}"
-                )
+
+            subscription_data["expires_at"] = parse_ns_datetime(
+                subscription_data.get("subscription-expires-datetime")
+            )
+            return subscription_data
+        except Exception as parse_error:
+            logger.error("Error parsing subscription response: %s", parse_error)
+            raise Exception("Failed to parse subscription response") from parse_error
 
     async def ns_delete_subscription(
         self, subscription_id: str, domain: str, token: str
@@ -163,32 +205,33 @@ class NetsapiensAPI:
           - token: A valid OAuth access token.
           - domain: domain of the subscription being deleted.
         """
-        url = f"{self.base_url}/ns-api/v2/subscriptions/{subscription_id}"
+        url = f"/ns-api/v2/subscriptions/{subscription_id}"
         headers = {
             "accept": "application/json",
             "Authorization": f"Bearer {token}",
         }
         payload = {"domain": domain}
-        logger.info(f"Deleting subscription for {payload}")
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(url, headers=headers)
-            response_text = response.text
-            logger.debug(
-                f"ns_delete_subscription - Response status: {response.status_code}"
-            )
-            logger.debug(f"ns_delete_subscription - Response text: {response_text}")
+        logger.info("Deleting subscription for %s", payload)
+        client = self.get_client()
+        response = await client.delete(url, headers=headers)
+        logger.debug(
+            "ns_delete_subscription - Response status: %s", response.status_code
+        )
 
-            if response.status_code is 202:
-                logger.info(f"Subscription {subscription_id} deleted successfully.")
-                return {"status": "success", "subscription_id": subscription_id}
-            else:
-                raise Exception(
-                    f"Failed to delete subscription. Status: {response.status_code}"
+        if not 200 <= response.status_code < 300:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "ns_delete_subscription - Response text: %s", response.text
                 )
+            raise Exception(
+                f"Failed to delete subscription. Status: {response.status_code}"
+            )
+        logger.info("Subscription %s deleted successfully.", subscription_id)
+        return {"status": "success", "subscription_id": subscription_id}
 
     async def update_subscription(
         self,
-        new_expire: str,
+        new_expire: datetime,
         subscription_id: str,
         token: str,
         domain: str,
@@ -202,7 +245,7 @@ class NetsapiensAPI:
 
         Parameters:
           - subscription_id: subscription ID to be updated
-          - new_expire: Expiration datetime as a formatted string YYYY-MM-DD HH:MM:SS.
+          - new_expire: Expiration datetime, sent to the API as YYYY-MM-DD HH:MM:SS.
           - token: A valid OAuth access token.
           - domain: the domain of the subscription being deleted.
 
@@ -210,39 +253,30 @@ class NetsapiensAPI:
           A dictionary containing the subscription details returned by the API.
         """
         payload = {
-            "subscription-expires-datetime": new_expire,
+            "subscription-expires-datetime": new_expire.strftime("%Y-%m-%d %H:%M:%S"),
             "domain": domain,
         }
 
-        url = f"{self.base_url}/ns-api/v2/subscriptions/{subscription_id}"
+        url = f"/ns-api/v2/subscriptions/{subscription_id}"
         headers = {
             "accept": "application/json",
             "content-type": "application/json",
             "Authorization": f"Bearer {token}",
         }
-        logger.info(f"Updating subscription:\n{url}\n{headers}\n{payload}")
+        logger.info("Updating subscription:\n%s\n%s\n%s", url, headers, payload)
+
+        client = self.get_client()
+        response = await client.put(url, content=orjson.dumps(payload), headers=headers)
+        logger.debug("update_subscription - Response status: %s", response.status_code)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.put(url, json=payload, headers=headers)
-            logger.debug(
-                f"create_subscription - Response status: {response.status_code}"
+        if not 200 <= response.status_code < 300:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("update_subscription - Response text: %s", response.text)
+            raise Exception(
+                f"Failed to update subscription. Status: {response.status_code}"
             )
-            logger.debug(f"create_subscription - Response text: {response.text}")
-
-            if response.status_code is 202:
-                try:
-                    logger.info(
-                        f"Subscription updated successfully: "
-                        f"ID={subscription_id}, "
-                        f"Expires={new_expire}"
-                    )
-                    return
-                except Exception as parse_error:
-                    logger.error(f"Error parsing subscription response: {parse_error}")
-                    raise Exception(
-                        "Failed to parse subscription response"
-                    ) from parse_error
-            else:
-                raise Exception(
-                    f"Failed to update subscription. Status: {response.status_code}"
-                )
+        logger.info(
+            "Subscription updated successfully: ID=%s, Expires=%s",
+            subscription_id,
+            new_expire,
+        )
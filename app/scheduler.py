@@ -1,10 +1,7 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.future import select
-from sqlalchemy import update
 from datetime import datetime, timezone
-from .db_utils import get_session
-from .models import Subscriptions
+from .subs_db import SubscriptionsDB
 from .config import Config
 import logging
 
@@ -17,39 +14,8 @@ scheduler = AsyncIOScheduler()
 
 # Define the time before expiration to update (e.g., 5 minutes before expiration)
 TIME_BEFORE_EXPIRATION = Config.TIME_BEFORE_EXPIRATION
-
-
-async def update_expiring_subscriptions(session):
-    now = datetime.now(timezone.utc)
-    expiration_threshold = now + TIME_BEFORE_EXPIRATION
-    renewal_threshold_str = expiration_threshold.strftime("%Y-%m-%d %H:%M:%S")
-
-    try:
-        # Query subscriptions that are expiring within the threshold
-        stmt = select(Subscriptions).where(
-            Subscriptions.expires <= renewal_threshold_str
-        )
-        result = await session.execute(stmt)
-        expiring_subscriptions = list(result.scalars().all())
-        logger.info(f"Fetched {len(expiring_subscriptions)} expiring subscriptions.")
-
-        for subscription in expiring_subscriptions:
-            # Log subscription details (using 'user' as defined in your model)
-            logger.info(
-                f"Updating subscription for user {subscription.user} with expiration {subscription.expires}"
-            )
-            # Update only the last_updated field
-            update_stmt = (
-                update(Subscriptions)
-                .where(Subscriptions.id == subscription.id)
-                .values(last_updated=now.strftime("%Y-%m-%d %H:%M:%S"))
-            )
-            await session.execute(update_stmt)
-
-        await session.commit()
-    except Exception as e:
-        logger.error(f"Error updating subscriptions: {str(e)}")
-        await session.rollback()
+# Run often enough to catch each subscription a few times inside that window, but no more
+SCHEDULER_INTERVAL = TIME_BEFORE_EXPIRATION / 4
 
 
 async def check_and_update_subscriptions():
@@ -57,8 +23,7 @@ async def check_and_update_subscriptions():
     Background task to check and update subscriptions nearing expiration.
     This task is called periodically by the scheduler.
     """
-    async with get_session() as session:
-        await update_expiring_subscriptions(session)
+    await SubscriptionsDB().renew_expiring(TIME_BEFORE_EXPIRATION)
 
 
 def start_scheduler():
@@ -68,8 +33,15 @@ def start_scheduler():
     """
     scheduler.add_job(
         check_and_update_subscriptions,
-        trigger=IntervalTrigger(minutes=1),  # Runs every minute; adjust as needed
+        trigger=IntervalTrigger(seconds=SCHEDULER_INTERVAL.total_seconds()),
         next_run_time=datetime.now(timezone.utc),  # Start immediately
+        # APScheduler already defaults to one running instance per job; being explicit keeps a
+        # slow tick from overlapping the next one, and missed runs collapse into a single run
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=30,
+        id="renew_subs",
+        replace_existing=True,
     )
     scheduler.start()
 
@@ -1,7 +1,9 @@
 import logging
-from typing import List
-from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import Interval, and_, bindparam, func, or_, text, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
 from sqlalchemy.future import select
 
 from .config import Config
@@ -13,6 +15,23 @@ from .db_utils import engine, get_session
 
 logger = logging.getLogger(__name__)
 
+# Application-wide key for the advisory lock that elects the one process running renewals
+RENEWAL_LOCK_KEY = 7243118001
+
+# Config is read once at import, so the default expiry window never changes at runtime
+_RENEWAL_DELTA = timedelta(seconds=Config.RENEWAL_INTERVAL)
+
+# Built once; each tick only binds its threshold. Same condition as expiring_clause()
+_RENEW_STMT = (
+    update(Subscriptions)
+    .where(
+        Subscriptions.expires <= func.now() + bindparam("threshold", type_=Interval())
+    )
+    .values(last_updated=func.now())
+    .returning(Subscriptions.id, Subscriptions.user, Subscriptions.expires)
+    .execution_options(synchronize_session=False)
+)
+
 
 # Subscription-specific database interactions.
 class SubscriptionsDB:
@@ -22,25 +41,218 @@ class SubscriptionsDB:
         """
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await self.migrate_timestamp_columns(conn)
         logger.info("Subscriptions table checked/created successfully.")
 
-    async def fetch_expiring_subscriptions(self) -> List[Subscriptions]:
+    async def migrate_timestamp_columns(self, conn: AsyncConnection) -> None:
         """
-        Fetches subscriptions that are set to expire before the next renewal interval.
-        Assumes the 'expires' column is stored as a formatted string.
+        Converts 'expires' and 'last_updated' from the old formatted-string columns
+        to TIMESTAMP WITH TIME ZONE, adds the 'last_renewal_attempt' column and makes sure
+        'expires' is indexed. The old strings were written as UTC "%Y-%m-%d %H:%M:%S".
+        Safe to run repeatedly.
         """
-        now = datetime.now(timezone.utc)
-        renewal_threshold = now + timedelta(seconds=Config.RENEWAL_INTERVAL)
-        renewal_threshold_str = renewal_threshold.strftime("%Y-%m-%d %H:%M:%S")
+        table = Subscriptions.__tablename__
+        result = await conn.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = :table "
+                "AND column_name IN ('expires', 'last_updated') "
+                "AND data_type = 'character varying'"
+            ),
+            {"table": table},
+        )
+        for column in result.scalars().all():
+            logger.info("Converting %s.%s to TIMESTAMP WITH TIME ZONE.", table, column)
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} "
+                    f"TYPE TIMESTAMP WITH TIME ZONE "
+                    f"USING NULLIF({column}, '')::timestamp AT TIME ZONE 'UTC'"
+                )
+            )
+        # create_all() does not add columns or indexes to a table that already exists
+        await conn.execute(
+            text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS "
+                f"last_renewal_attempt TIMESTAMP WITH TIME ZONE"
+            )
+        )
+        await conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS ix_{table}_expires ON {table} (expires)")
+        )
+
+    async def acquire_renewal_lock(self) -> Optional[AsyncConnection]:
+        """
+        Tries to take the session-level advisory lock that makes this process the one running
+        renewals. Returns the connection holding the lock, which must stay open for as long
+        as the lock is needed, or None if another process already holds it.
+        """
+        conn = await engine.connect()
+        try:
+            result = await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": RENEWAL_LOCK_KEY}
+            )
+            acquired = result.scalar()
+            await conn.commit()
+        except SQLAlchemyError:
+            await conn.close()
+            raise
+        if acquired:
+            logger.info("Acquired the renewal lock.")
+            return conn
+        await conn.close()
+        return None
+
+    async def holds_renewal_lock(self, conn: AsyncConnection) -> bool:
+        """
+        Checks that the connection still owns the renewal lock. Postgres releases the lock
+        as soon as that connection drops, so being connected is not enough: the backend
+        behind it must be the one listed in pg_locks. A bigint key is stored there split
+        into classid (high 32 bits) and objid (low 32 bits), with objsubid 1.
+        """
+        try:
+            result = await conn.execute(
+                text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_locks "
+                    "WHERE locktype = 'advisory' AND granted "
+                    "AND pid = pg_backend_pid() AND objsubid = 1 "
+                    "AND ((classid::bigint << 32) | objid::bigint) = :key)"
+                ),
+                {"key": RENEWAL_LOCK_KEY},
+            )
+            held = bool(result.scalar())
+            await conn.commit()
+        except SQLAlchemyError as e:
+            logger.error("Lost the renewal lock connection: %s", e)
+            return False
+        if not held:
+            logger.error("The renewal lock is no longer held by this connection.")
+        return held
+
+    async def release_renewal_lock(self, conn: AsyncConnection) -> None:
+        """
+        Releases the renewal lock and closes its connection. The unlock is explicit because
+        closing only returns the connection to the pool, which would keep the lock held.
+        """
+        try:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": RENEWAL_LOCK_KEY}
+            )
+            await conn.commit()
+        except SQLAlchemyError:
+            # the connection is broken, so the lock is already gone; don't pool it again
+            await conn.invalidate()
+        finally:
+            await conn.close()
+        logger.info("Released the renewal lock.")
+
+    @staticmethod
+    def expiring_clause(threshold: Optional[timedelta] = None):
+        """
+        SQL condition matching subscriptions that expire within `threshold` of the database
+        clock (default: the next renewal interval). renew_expiring's prebuilt _RENEW_STMT
+        uses the same condition with the threshold as a bind parameter.
+        """
+        if threshold is None:
+            threshold = _RENEWAL_DELTA
+        return Subscriptions.expires <= func.now() + threshold
+
+    @staticmethod
+    def due_clause():
+        """
+        SQL condition matching subscriptions that are due for a renewal attempt: expiring
+        within the renewal interval and not attempted within the last renewal interval.
+        Rows that failed to renew are therefore retried once per interval, not every sweep.
+        """
+        return and_(
+            SubscriptionsDB.expiring_clause(),
+            or_(
+                Subscriptions.last_renewal_attempt.is_(None),
+                Subscriptions.last_renewal_attempt <= func.now() - _RENEWAL_DELTA,
+            ),
+        )
+
+    async def renew_expiring(self, threshold: timedelta) -> int:
+        """
+        Marks every subscription expiring within `threshold` as updated, with a single
+        UPDATE in one transaction. RETURNING hands back the touched rows for the audit
+        log, so no separate SELECT is needed. Returns the number of rows touched
+        (0 if the update failed and was rolled back). Only 'last_updated' is written, so
+        this doesn't count as a renewal attempt for due_clause's backoff.
+        """
+        async with get_session() as session:
+            try:
+                # One transaction for the whole batch: commits on exit, rolls back on error
+                async with session.begin():
+                    result = await session.execute(
+                        _RENEW_STMT, {"threshold": threshold}
+                    )
+                    rows = result.all()
+            except SQLAlchemyError:
+                # handled here, inside the session, so it isn't turned into an HTTPException
+                logger.exception("Error updating expiring subscriptions")
+                return 0
+        for row in rows:
+            logger.info(
+                "renewed id=%s user=%s expires=%s", row.id, row.user, row.expires
+            )
+        logger.info("Updated %d expiring subscriptions.", len(rows))
+        return len(rows)
+
+    async def fetch_next_due(self) -> Optional[datetime]:
+        """
+        Returns the earliest time any subscription becomes due (see due_clause), or None if
+        the table is empty. A row is due once it is inside the renewal window and its last
+        attempt is at least one renewal interval old.
+        """
+        # GREATEST skips NULLs, so rows never attempted are due by their expiry alone
+        due_at = func.greatest(
+            Subscriptions.expires - _RENEWAL_DELTA,
+            Subscriptions.last_renewal_attempt + _RENEWAL_DELTA,
+        )
         try:
             async with get_session() as session:
-                stmt = select(Subscriptions).where(
-                    Subscriptions.expires <= renewal_threshold_str
-                )
+                result = await session.execute(select(func.min(due_at)))
+                return result.scalar()
+        except SQLAlchemyError as e:
+            logger.exception("Error fetching next subscription due time")
+            raise Exception("Failed to fetch next subscription due time") from e
+
+    async def fetch_expiring_domains(self) -> List[str]:
+        """
+        Fetches the distinct domains that have subscriptions due for renewal.
+        The deduplication happens in the database.
+        """
+        try:
+            async with get_session() as session:
+                stmt = select(Subscriptions.domain).where(self.due_clause()).distinct()
                 result = await session.execute(stmt)
-                subscriptions = list(result.scalars().all())
-                logger.info(f"Fetched {len(subscriptions)} expiring subscriptions.")
-                return subscriptions
+                domains = list(result.scalars().all())
+                logger.info(
+                    "Fetched %d domains with expiring subscriptions.", len(domains)
+                )
+                return domains
         except SQLAlchemyError as e:
-            logger.exception("Error fetching expiring subscriptions: {e}")
-            raise Exception("Failed to fetch subscriptions") from e
+            logger.exception("Error fetching expiring domains")
+            raise Exception("Failed to fetch expiring domains") from e
+
+    async def fetch_subscriptions_by_domain(
+        self, domains: List[str]
+    ) -> Dict[str, List[Subscriptions]]:
+        """
+        Fetches every subscription for the given domains in a single query,
+        grouped by domain.
+        """
+        by_domain: Dict[str, List[Subscriptions]] = {}
+        if not domains:
+            return by_domain
+        # one buffered query: every row is kept for grouping anyway, so a server-side
+        # cursor would only add round trips without lowering peak memory
+        async with get_session() as session:
+            result = await session.execute(
+                select(Subscriptions).where(Subscriptions.domain.in_(domains))
+            )
+            for sub in result.scalars():
+                by_domain.setdefault(sub.domain, []).append(sub)
+        logger.info("Fetched subscriptions for %d domains.", len(by_domain))
+        return by_domain
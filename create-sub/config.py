@@ -13,14 +13,18 @@ class Config:
         "message",
         "agent",
     ]
+    VALID_MODELS_SET = frozenset(VALID_MODELS)
     DEFAULT_POST_URL = "<post_url>"
     DEFAULT_DOMAIN_PATTERN = r"^\d{10}\.com$"
+    _DOMAIN_RE = re.compile(DEFAULT_DOMAIN_PATTERN)
     DEFAULT_EXPIRES = 1
 
     # URL to post the data
     POST_HOST = "http://localhost:8001/create-subscription"
+    # URL to post lists of subscriptions to in batch mode
+    BATCH_POST_HOST = "http://localhost:8001/create-subscriptions"
 
     @staticmethod
     def is_valid_domain(domain: str) -> bool:
-        """Validate domain using regex"""
-        return bool(re.match(Config.DEFAULT_DOMAIN_PATTERN, domain))
+        """Validate domain using the pre-compiled regex"""
+        return Config._DOMAIN_RE.match(domain) is not None
@@ -1,36 +1,60 @@
+import argparse
+import asyncio
+import csv
+
+import httpx
 import requests
 from config import Config
 
+# Subscriptions sent per POST in batch mode
+BATCH_SIZE = 100
+# Max concurrent POSTs in batch mode; the server creates each list's subscriptions under
+# its own NS API concurrency cap, so more lists in flight only queue up there
+BATCH_CONCURRENCY = 2
+# Read timeout allowed per subscription in a list: each one costs the server two NS API calls
+BATCH_ITEM_TIMEOUT = 10
 
-def get_user_input():
-    """Collect and validate user input for model, domain, post_url, expires, and user."""
+# Reused across posts so keep-alive connections skip repeated TCP/TLS handshakes
+_HTTP = requests.Session()
+_HTTP.headers.update({"Content-Type": "application/json"})
 
-    # Ask for the model
+
+def prompt_model():
+    """Ask for the model until a valid one is given."""
     model = input(f"Enter model (default: {Config.DEFAULT_MODEL}): ").strip().lower()
     if not model:
         model = Config.DEFAULT_MODEL
-    while model not in Config.VALID_MODELS:
+    while model not in Config.VALID_MODELS_SET:
         print(f"Invalid model. Valid options are: {', '.join(Config.VALID_MODELS)}")
         model = (
             input(f"Enter model (default: {Config.DEFAULT_MODEL}): ").strip().lower()
         )
         if not model:
             model = Config.DEFAULT_MODEL
+    return model
+
 
-    # Ask for the domain
+def prompt_domain():
+    """Ask for the domain until a valid one is given."""
     domain = input("Enter domain (10-digit number followed by .com): ").strip().lower()
     while not Config.is_valid_domain(domain):
         print("Invalid domain format. Example: 1234567890.com")
         domain = (
             input("Enter domain (10-digit number followed by .com): ").strip().lower()
         )
+    return domain
 
-    # Ask for the post_url
+
+def prompt_post_url():
+    """Ask for the post_url."""
     post_url = input(f"Enter post_url (default: {Config.DEFAULT_POST_URL}): ").strip()
     if not post_url:
         post_url = Config.DEFAULT_POST_URL
+    return post_url
+
 
-    # Ask for the number of days before expiration
+def prompt_expires():
+    """Ask for the number of days before expiration."""
     try:
         expires = int(
             input(
@@ -41,11 +65,37 @@ def get_user_input():
     except ValueError:
         print(f"Invalid input. Defaulting to {Config.DEFAULT_EXPIRES} days.")
         expires = Config.DEFAULT_EXPIRES
+    return expires
+
+
+def prompt_user():
+    """Ask for the user (optional)."""
+    return input("Enter user (optional, press Enter to skip): ").strip() or None
 
-    # Ask for the user (optional)
-    user = input("Enter user (optional, press Enter to skip): ").strip() or None
 
-    return model, domain, post_url, expires, user
+# Prompt for each field, in the order they are collected
+FIELD_PROMPTS = {
+    "model": prompt_model,
+    "domain": prompt_domain,
+    "post_url": prompt_post_url,
+    "expires": prompt_expires,
+    "user": prompt_user,
+}
+
+
+def get_user_input():
+    """Collect and validate user input for model, domain, post_url, expires, and user."""
+    return {field: prompt() for field, prompt in FIELD_PROMPTS.items()}
+
+
+def choose_field_to_edit():
+    """Ask which field to change after the user rejects the confirmation."""
+    options = "/".join([*FIELD_PROMPTS, "none"])
+    field = input(f"Which field to change? [{options}]: ").strip().lower()
+    while field not in FIELD_PROMPTS and field != "none":
+        print(f"Invalid field. Valid options are: {options}")
+        field = input(f"Which field to change? [{options}]: ").strip().lower()
+    return None if field == "none" else field
 
 
 def confirm_input(model, domain, post_url, expires, user):
@@ -61,9 +111,8 @@ def confirm_input(model, domain, post_url, expires, user):
     return confirmation == "y"
 
 
-def post_data(model, domain, post_url, expires, user):
-    """Send the collected data via a POST request to the configured host."""
-    # Build the data dictionary dynamically
+def build_payload(model, domain, post_url, expires, user):
+    """Build the JSON body for one subscription."""
     data = {
         "model": model,
         "domain": domain,
@@ -72,9 +121,15 @@ def post_data(model, domain, post_url, expires, user):
     }
     if user:  # Include user only if provided
         data["user"] = user
+    return data
+
+
+def post_data(model, domain, post_url, expires, user):
+    """Send the collected data via a POST request to the configured host."""
+    data = build_payload(model, domain, post_url, expires, user)
 
     try:
-        response = requests.post(Config.POST_HOST, json=data)
+        response = _HTTP.post(Config.POST_HOST, json=data, timeout=10)
         response.raise_for_status()  # Raise an error for bad status codes
         print("Subscription created successfully!")
         print(f"Response: {response.json()}")
@@ -82,19 +137,143 @@ def post_data(model, domain, post_url, expires, user):
         print(f"Failed to create subscription: {e}")
 
 
+def read_batch_file(path):
+    """
+    Read subscriptions from a CSV file with the columns
+    model,domain,post_url,expires,user,username,password.
+    Empty model, post_url and expires fall back to the same defaults as the interactive
+    prompts. user, username and password (the NS API login for the domain) are required,
+    as the bulk endpoint rejects the whole list if any item lacks them. A header row
+    starting with "model" is skipped. Returns the valid payloads and a list of errors.
+    """
+    payloads, errors = [], []
+    with open(path, newline="") as f:
+        for line_no, row in enumerate(csv.reader(f), start=1):
+            if not row or (line_no == 1 and row[0].strip().lower() == "model"):
+                continue
+            model, domain, post_url, expires, user, username, password = (
+                [field.strip() for field in row] + [""] * 7
+            )[:7]
+            model = model.lower() or Config.DEFAULT_MODEL
+            domain = domain.lower()
+            if model not in Config.VALID_MODELS_SET:
+                errors.append(f"line {line_no}: invalid model {model!r}")
+                continue
+            if not Config.is_valid_domain(domain):
+                errors.append(f"line {line_no}: invalid domain {domain!r}")
+                continue
+            try:
+                expires = int(expires or Config.DEFAULT_EXPIRES)
+            except ValueError:
+                errors.append(f"line {line_no}: invalid expires {expires!r}")
+                continue
+            missing = [
+                name
+                for name, value in (
+                    ("user", user),
+                    ("username", username),
+                    ("password", password),
+                )
+                if not value
+            ]
+            if missing:
+                errors.append(f"line {line_no}: missing {', '.join(missing)}")
+                continue
+            data = build_payload(
+                model, domain, post_url or Config.DEFAULT_POST_URL, expires, user
+            )
+            data["username"] = username
+            data["password"] = password
+            payloads.append(data)
+    return payloads, errors
+
+
+async def post_batch(payloads):
+    """
+    POST the payloads in lists of BATCH_SIZE to the bulk endpoint, which stores each list
+    with one database write. Lists are sent concurrently over one shared HTTP/2 client,
+    at most BATCH_CONCURRENCY at a time. The read timeout grows with the list size, so a
+    slow but working server isn't reported as failed while it keeps creating the list.
+    Returns the number of subscriptions that failed.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    chunks = [payloads[i : i + BATCH_SIZE] for i in range(0, len(payloads), BATCH_SIZE)]
+
+    async with httpx.AsyncClient(http2=True, timeout=10) as client:
+
+        async def post_chunk(chunk):
+            async with semaphore:
+                timeout = httpx.Timeout(10, read=BATCH_ITEM_TIMEOUT * len(chunk))
+                response = await client.post(
+                    Config.BATCH_POST_HOST, json=chunk, timeout=timeout
+                )
+                response.raise_for_status()
+                return response.json()
+
+        results = await asyncio.gather(
+            *(post_chunk(chunk) for chunk in chunks), return_exceptions=True
+        )
+
+    failed = 0
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, Exception):
+            failed += len(chunk)
+            # the server may still be working on this list, so re-running could duplicate it
+            print(
+                f"No result for a list of {len(chunk)} subscriptions: {result}. "
+                "Some may still have been created; check before re-sending them."
+            )
+            continue
+        # the endpoint answers with one status entry per subscription, in order
+        for data, outcome in zip(chunk, result):
+            if outcome.get("status") != "success":
+                failed += 1
+                print(
+                    f"Failed to create subscription for {data['domain']}: "
+                    f"{outcome.get('detail')}"
+                )
+    print(f"Created {len(payloads) - failed} of {len(payloads)} subscriptions.")
+    return failed
+
+
+def run_batch(path):
+    """Validate a batch file and create all of its subscriptions."""
+    payloads, errors = read_batch_file(path)
+    if errors:
+        print("Batch file has invalid rows; nothing was sent:")
+        for error in errors:
+            print(f"  {error}")
+        return
+    asyncio.run(post_batch(payloads))
+
+
 def main():
     """Main entry point for the program."""
-    while True:
-        # Step 1: Collect input
-        model, domain, post_url, expires, user = get_user_input()
+    parser = argparse.ArgumentParser(description="Create subscriptions.")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE.csv",
+        help="create every subscription listed in a CSV file instead of prompting",
+    )
+    args = parser.parse_args()
+    if args.batch:
+        run_batch(args.batch)
+        return
 
+    # Step 1: Collect input
+    state = get_user_input()
+    while True:
         # Step 2: Confirm the input
-        if confirm_input(model, domain, post_url, expires, user):
+        if confirm_input(**state):
             # Step 3: Send POST request with confirmed input
-            post_data(model, domain, post_url, expires, user)
+            post_data(**state)
+            break
+        # Only re-ask for the field that was wrong; keep the validated rest
+        field = choose_field_to_edit()
+        if field is None:
+            print("Cancelled.")
             break
-        else:
-            print("Let's try again.")
+        state[field] = FIELD_PROMPTS[field]()
 
 
 if __name__ == "__main__":
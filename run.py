@@ -1,8 +1,20 @@
 import uvicorn
+from app.config import get_env_variable
 from app.logging_config import setup_logging
 
 # Initialize centralized logging
 setup_logging()
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8001, reload=True)
+    # Auto-reload is for local development only; it runs a file watcher and a single worker
+    dev = get_env_variable("ENV", "prod") == "dev"
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8001,
+        reload=dev,
+        workers=1 if dev else int(get_env_variable("WEB_CONCURRENCY", 1) or 1),
+        loop="uvloop",
+        http="httptools",
+        log_config=None,  # setup_logging() already configured the handlers
+    )